@@ -0,0 +1,113 @@
+import zlib
+import struct
+import base64
+import math
+import colorsys
+
+# Minimal, standard-library-only PNG encoder used by modules that produce
+# matrix-shaped data. Rendering to an image on the agent means the payload
+# size depends on the image content rather than on the number of cells.
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+COLOR_TYPE_RGB = 2
+COLOR_TYPE_RGBA = 6
+
+def _chunk(tag, data):
+    return (struct.pack('>I', len(data)) + tag + data +
+            struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+def encode_png(width, height, rows, color_type=COLOR_TYPE_RGB, level=6):
+    """
+    Encodes 8-bit pixel rows into a PNG file.
+    'rows' is an iterable of 'height' bytes objects, each holding 'width'
+    pixels (3 bytes per pixel for RGB, 4 for RGBA).
+    """
+    # Every scanline is prefixed with its filter type; 0 means no filtering.
+    raw = b''.join(b'\x00' + row for row in rows)
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0)
+    return (PNG_SIGNATURE +
+            _chunk(b'IHDR', ihdr) +
+            _chunk(b'IDAT', zlib.compress(raw, level)) +
+            _chunk(b'IEND', b''))
+
+# --- Colormaps ---
+# Each colormap turns a position t in [0, 1] into a pixel. They are sampled
+# once into a 256 entry lookup table, so rendering is a table lookup per cell.
+
+def _hsl_color(t):
+    """Same blue-to-red ramp the heatmap widget uses for its JSON mode."""
+    r, g, b = colorsys.hls_to_rgb((240 * (1 - t)) / 360, 0.5, 0.8)
+    return bytes((round(r * 255), round(g * 255), round(b * 255), round((0.2 + 0.8 * t) * 255)))
+
+def _gray_color(t):
+    v = round(t * 255)
+    return bytes((v, v, v))
+
+COLORMAPS = {
+    "hsl": (_hsl_color, COLOR_TYPE_RGBA),
+    "gray": (_gray_color, COLOR_TYPE_RGB),
+}
+
+def _build_lut(colormap):
+    color, color_type = COLORMAPS[colormap]
+    return [color(i / 255) for i in range(256)], color_type
+
+def render_matrix(matrix, colormap="hsl", vmin=None, vmax=None, scale="linear"):
+    """
+    Applies value scaling and a colormap to a 2D list of numbers and encodes
+    the result as a PNG. Returns a JSON-serializable dict with the Base64
+    image and the value range needed to draw a legend.
+    """
+    if colormap not in COLORMAPS:
+        raise ValueError(f"Unknown colormap '{colormap}'. Available: {', '.join(COLORMAPS)}")
+    if scale not in ("linear", "log"):
+        raise ValueError(f"Unknown scale '{scale}'. Use 'linear' or 'log'.")
+
+    height = len(matrix)
+    width = len(matrix[0]) if height else 0
+    if width == 0:
+        raise ValueError("Cannot render an empty matrix.")
+
+    if vmin is None:
+        vmin = min(min(row) for row in matrix)
+    if vmax is None:
+        vmax = max(max(row) for row in matrix)
+
+    if scale == "log":
+        # Non-positive values cannot be shown on a log scale; clamp them.
+        floor = vmin if vmin > 0 else 1e-12
+        transform = lambda v: math.log10(v if v > floor else floor)
+        lo, hi = transform(floor), transform(vmax)
+    else:
+        transform = None
+        lo, hi = vmin, vmax
+
+    span = hi - lo
+    factor = 255 / span if span > 0 else 0.0
+    lut, color_type = _build_lut(colormap)
+
+    # Pad the table on both sides so out-of-range values clamp to the end
+    # colors without a per-cell comparison.
+    lut = [lut[0]] * 256 + lut + [lut[255]] * 256
+    offset = 256 - lo * factor
+    rows = []
+    for row in matrix:
+        values = map(transform, row) if transform else row
+        indices = [int(v * factor + offset) for v in values]
+        if min(indices) < 0 or max(indices) > 767:
+            indices = [0 if i < 0 else 767 if i > 767 else i for i in indices]
+        rows.append(b''.join([lut[i] for i in indices]))
+
+    png = encode_png(width, height, rows, color_type)
+    return {
+        "encoding": "png",
+        "mime_type": "image/png",
+        "b64_image": base64.b64encode(png).decode('utf-8'),
+        "width": width,
+        "height": height,
+        "vmin": vmin,
+        "vmax": vmax,
+        "scale": scale,
+        "colormap": colormap
+    }
@@ -7,20 +7,37 @@ import sys
 import io
 import os
 import time
+import random
 
 # Assume the common framing utils are in a shared location
 from .common.framing import send_frame, recv_frame
+from . import profiling
 
 # --- Configuration ---
 
 MODULE_DIR = os.path.join(os.path.dirname(__file__), '..', 'modules')
 
+# Reconnection uses exponential backoff with full jitter, so a fleet of clients
+# that lost the relay at the same moment does not reconnect in lockstep.
+RECONNECT_BASE_DELAY = 1.0   # seconds
+RECONNECT_MAX_DELAY = 60.0   # seconds
+# A connection that stayed up this long was healthy: start over at the base delay.
+RECONNECT_RESET_AFTER = 30.0 # seconds
+
 class Client:
     def __init__(self, client_id: str, RELAY_HOST: str, RELAY_PORT: int):
         self.client_id = client_id
         self._loaded_modules = {}
         self.RELAY_HOST = RELAY_HOST
         self.RELAY_PORT = RELAY_PORT
+        # Responses can also be sent from profiling threads.
+        self._send_lock = threading.Lock()
+        self._profile_window = None
+        self._profile_thread = None
+
+    def _send(self, sock, obj):
+        with self._send_lock:
+            send_frame(sock, obj)
 
     def _load_module(self, name: str):
         if name in self._loaded_modules:
@@ -37,7 +54,10 @@ class Client:
         self._loaded_modules[name] = mod
         return mod
 
-    def _handle_command(self, cmd: dict) -> dict:
+    def _handle_command(self, cmd: dict, sock=None) -> dict:
+        if cmd.get('action') == 'profile':
+            return self._handle_profile(cmd, sock)
+
         exp_name = cmd.get('experiment')
         endpoint = cmd.get('endpoint', {})
         req_id = cmd.get('id')
@@ -50,9 +70,11 @@ class Client:
             buf_out, buf_err = io.StringIO(), io.StringIO()
             sys.stdout, sys.stderr = buf_out, buf_err
             
-            result = mod.handle(endpoint)
-            
-            sys.stdout, sys.stderr = old_stdout, old_stderr
+            try:
+                window = self._profile_window
+                result = window.call(mod.handle, endpoint) if window else mod.handle(endpoint)
+            finally:
+                sys.stdout, sys.stderr = old_stdout, old_stderr
 
             return {
                 "type": "response", "id": req_id, "code": 1,
@@ -66,10 +88,88 @@ class Client:
                 "response": {"error": str(e)}, "stdout": "", "stderr": ""
             }
 
+    def _handle_profile(self, cmd: dict, sock) -> dict:
+        """
+        Profiles module code on request of the relay's /profile endpoint.
+        Either runs one experiment endpoint N times, or opens a sampling window
+        over all module calls. Both run off the receive loop, so data requests
+        keep being served, and send their response when done; this returns
+        None in that case.
+        """
+        req_id = cmd.get('id')
+        try:
+            options = profiling.parse_options(cmd.get('profile', {}))
+
+            if options["window"] > 0:
+                if self._profile_window:
+                    raise RuntimeError("A profiling window is already running.")
+                window = profiling.SamplingWindow(options)
+                self._profile_window = window
+                timer = threading.Timer(options["window"], self._finish_profile_window, args=(window, req_id, sock))
+                timer.daemon = True
+                timer.start()
+                return None
+
+            if self._profile_thread and self._profile_thread.is_alive():
+                raise RuntimeError("A profiling run is already in progress.")
+            exp_name = cmd.get('experiment')
+            endpoint = cmd.get('endpoint', {})
+            mod = self._load_module(exp_name)
+            self._profile_thread = threading.Thread(
+                target=self._run_profile, args=(mod, exp_name, endpoint, options, req_id, sock), daemon=True)
+            self._profile_thread.start()
+            return None
+        except Exception as e:
+            print(f"Error handling profile command: {e}")
+            return {
+                "type": "response", "id": req_id, "code": 0,
+                "response": {"error": str(e)}, "stdout": "", "stderr": ""
+            }
+
+    def _run_profile(self, mod, exp_name, endpoint, options, req_id, sock):
+        try:
+            result = profiling.profile_calls(mod.handle, endpoint, options)
+            result.update({"experiment": exp_name, "endpoint": endpoint})
+            response = {
+                "type": "response", "id": req_id, "code": 1,
+                "response": {"profile": result}, "stdout": "", "stderr": ""
+            }
+        except Exception as e:
+            print(f"Error handling profile command: {e}")
+            response = {
+                "type": "response", "id": req_id, "code": 0,
+                "response": {"error": str(e)}, "stdout": "", "stderr": ""
+            }
+        try:
+            self._send(sock, response)
+        except OSError as e:
+            print(f"Could not send profiling results, connection lost: {e}")
+
+    def _finish_profile_window(self, window, req_id, sock):
+        self._profile_window = None
+        response = {
+            "type": "response", "id": req_id, "code": 1,
+            "response": {"profile": window.finish()}, "stdout": "", "stderr": ""
+        }
+        try:
+            self._send(sock, response)
+        except OSError as e:
+            print(f"Could not send profiling results, connection lost: {e}")
+
+    def _reconnect_delay(self, attempt: int) -> float:
+        """Random delay in [0, min(max, base * 2^attempt)] ("full jitter")."""
+        ceiling = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** min(attempt, 32))
+        return random.uniform(0, ceiling)
+
     def run(self):
+        attempt = 0
         while True:
+            connected_at = None
+            sock = None
+            replaced = False
             try:
                 sock = socket.create_connection((self.RELAY_HOST, self.RELAY_PORT))
+                connected_at = time.monotonic()
                 print(f"Connected to relay at {self.RELAY_HOST}:{self.RELAY_PORT}")
                 
                 # Announce ourselves to the relay
@@ -82,13 +182,31 @@ class Client:
                         print("Relay disconnected.")
                         break
                     
+                    if msg.get('type') == 'replaced':
+                        # Another client registered with our id and the relay
+                        # kept it; reconnecting would only take the id back.
+                        print(f"Another client registered as '{self.client_id}'. Stopping.")
+                        replaced = True
+                        break
+
                     if msg.get('type') == 'command':
-                        response = self._handle_command(msg)
-                        send_frame(sock, response)
+                        response = self._handle_command(msg, sock)
+                        if response is not None:
+                            self._send(sock, response)
 
             except ConnectionRefusedError:
-                print("Connection to relay refused. Retrying in 5 seconds...")
-                time.sleep(5)
+                print("Connection to relay refused.")
             except Exception as e:
-                print(f"An error occurred: {e}. Reconnecting in 5 seconds...")
-                time.sleep(5)
\ No newline at end of file
+                print(f"An error occurred: {e}.")
+            finally:
+                if sock:
+                    sock.close()
+
+            if replaced:
+                return
+            if connected_at is not None and time.monotonic() - connected_at >= RECONNECT_RESET_AFTER:
+                attempt = 0
+            delay = self._reconnect_delay(attempt)
+            attempt += 1
+            print(f"Reconnecting in {delay:.1f} seconds...")
+            time.sleep(delay)
\ No newline at end of file
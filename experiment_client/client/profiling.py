@@ -0,0 +1,219 @@
+import cProfile
+import pstats
+import threading
+import time
+import tracemalloc
+
+# Helpers behind the relay's /profile endpoint. They either run one module
+# endpoint N times under cProfile and/or tracemalloc, or sample every module
+# call the client makes during a time window, and summarize the results as
+# JSON-serializable hot function and allocation site lists.
+
+MODES = ("cprofile", "tracemalloc")
+DEFAULT_TOP = 20
+# Upper bounds for one request: the agent keeps serving data meanwhile, and
+# the relay waits for the results.
+MAX_RUNS = 100
+MAX_WINDOW = 300.0  # seconds
+# Allocation sites come from snapshots, which walk every live allocation.
+# Only this many calls per window get one; the others are only measured.
+MAX_SITE_SAMPLES = 20
+# Tracing makes a call about ten times slower and later runs repeat the first
+# one's allocations, so the tracemalloc pass stops after this many runs.
+MAX_TRACED_RUNS = 3
+
+# Frames from the profilers themselves are noise in the results.
+_IGNORED_FILES = (__file__, tracemalloc.__file__)
+
+def parse_options(options: dict) -> dict:
+    """Validates the string options sent by the relay. Raises ValueError."""
+    modes = [m.strip() for m in options.get("mode", "cprofile").split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown or not modes:
+        raise ValueError(f"Unknown profile mode {unknown or modes}. Use: {', '.join(MODES)}")
+
+    runs = int(options.get("runs", 1))
+    top = int(options.get("top", DEFAULT_TOP))
+    window = float(options.get("window", 0))
+    if runs < 1 or top < 1 or window < 0:
+        raise ValueError("'runs' and 'top' must be positive and 'window' non-negative.")
+    if runs > MAX_RUNS or window > MAX_WINDOW:
+        raise ValueError(f"'runs' is limited to {MAX_RUNS} and 'window' to {MAX_WINDOW:g} seconds.")
+    return {"modes": modes, "runs": runs, "top": top, "window": window}
+
+def hot_functions(profile: cProfile.Profile, top: int) -> list:
+    """The 'top' functions with the most own time (excluding callees)."""
+    profile.create_stats()
+    if not profile.stats:
+        return []  # nothing ran, e.g. a window without module calls
+    stats = pstats.Stats(profile).stats
+    rows = []
+    for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.items():
+        if filename in _IGNORED_FILES or "_lsprof.Profiler" in function:
+            continue
+        rows.append({
+            "function": function,
+            "file": filename,
+            "line": line,
+            "calls": calls,
+            "tottime_ms": round(tottime * 1000, 3),
+            "cumtime_ms": round(cumtime * 1000, 3)
+        })
+    rows.sort(key=lambda row: row["tottime_ms"], reverse=True)
+    return rows[:top]
+
+def _reset_peak():
+    """Starts peak tracking over, so earlier activity does not count (Python 3.9+)."""
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+
+class _AllocationTally:
+    """
+    Memory of individual module calls, measured while each call's return value
+    is still alive (a payload freed before the measurement would not show up),
+    so payloads never pile up across calls.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.payload_bytes = 0
+        self.peak_bytes = 0
+        self.sites = {}  # (file, line) -> [size, count]
+
+    def measure(self, call, with_sites):
+        """Runs call() under tracemalloc, which must be tracing. Returns its result."""
+        before = tracemalloc.take_snapshot() if with_sites else None
+        start = tracemalloc.get_traced_memory()[0]
+        _reset_peak()
+        result = call()
+        current, peak = tracemalloc.get_traced_memory()
+        self.calls += 1
+        self.payload_bytes += current - start
+        self.peak_bytes = max(self.peak_bytes, peak - start)
+        if with_sites:
+            self._add_sites(before, tracemalloc.take_snapshot())
+        return result
+
+    def _add_sites(self, before, after):
+        # Skipping our own frames here is much cheaper than filter_traces()
+        # on a snapshot that holds a large payload.
+        for diff in after.compare_to(before, 'lineno'):
+            frame = diff.traceback[0]
+            if frame.filename in _IGNORED_FILES:
+                continue
+            totals = self.sites.setdefault((frame.filename, frame.lineno), [0, 0])
+            totals[0] += diff.size_diff
+            totals[1] += diff.count_diff
+
+    def summary(self, top: int) -> dict:
+        """Average memory kept per call, largest peak above the starting point, top allocation sites."""
+        rows = sorted(self.sites.items(), key=lambda item: abs(item[1][0]), reverse=True)
+        return {
+            "payload_kb": round(self.payload_bytes / max(self.calls, 1) / 1024, 3),
+            "peak_kb": round(self.peak_bytes / 1024, 3),
+            "allocations": [
+                {"file": file, "line": line, "size_kb": round(size / 1024, 3), "count": count}
+                for (file, line), (size, count) in rows[:top]
+            ]
+        }
+
+def profile_calls(func, endpoint: dict, options: dict) -> dict:
+    """
+    Calls func(endpoint) 'runs' times for each requested mode. The modes run
+    in separate passes so tracemalloc's overhead does not skew the timings.
+    """
+    result = {"runs": options["runs"], "modes": options["modes"]}
+
+    if "cprofile" in options["modes"]:
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        for _ in range(options["runs"]):
+            profile.enable()
+            try:
+                func(endpoint)
+            finally:
+                profile.disable()
+        elapsed = time.perf_counter() - start
+        result["total_ms"] = round(elapsed * 1000, 3)
+        result["per_run_ms"] = round(elapsed * 1000 / options["runs"], 3)
+        result["hot_functions"] = hot_functions(profile, options["top"])
+
+    if "tracemalloc" in options["modes"]:
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        tally = _AllocationTally()
+        traced_runs = min(options["runs"], MAX_TRACED_RUNS)
+        try:
+            # Every run allocates at the same sites, so the first one is enough
+            # for them; the others only add to the payload and peak figures.
+            for run in range(traced_runs):
+                tally.measure(lambda: func(endpoint), with_sites=run == 0)
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        result["traced_runs"] = traced_runs
+        result.update(tally.summary(options["top"]))
+
+    return result
+
+
+class SamplingWindow:
+    """
+    Profiles every module call made while the window is open. The client
+    routes module calls through call() and a timer calls finish() when the
+    window ends, which returns the aggregated results.
+    """
+
+    def __init__(self, options: dict):
+        self.options = options
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._profile = cProfile.Profile() if "cprofile" in options["modes"] else None
+        self._started_tracing = False
+        self._tally = None
+
+        if "tracemalloc" in options["modes"]:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            self._tally = _AllocationTally()
+        self._started_at = time.perf_counter()
+
+    def call(self, func, endpoint: dict):
+        # Holding the lock for the whole call means finish() never cuts a call in half.
+        with self._lock:
+            if self._closed:
+                return func(endpoint)
+            self.calls += 1
+            if self._tally:
+                with_sites = self._tally.calls < MAX_SITE_SAMPLES
+                return self._tally.measure(lambda: self._profiled(func, endpoint), with_sites)
+            return self._profiled(func, endpoint)
+
+    def _profiled(self, func, endpoint: dict):
+        if self._profile:
+            self._profile.enable()
+        try:
+            return func(endpoint)
+        finally:
+            if self._profile:
+                self._profile.disable()
+
+    def finish(self) -> dict:
+        with self._lock:
+            self._closed = True
+
+        result = {
+            "modes": self.options["modes"],
+            "window_s": round(time.perf_counter() - self._started_at, 3),
+            "calls": self.calls
+        }
+        if self._profile:
+            result["hot_functions"] = hot_functions(self._profile, self.options["top"])
+        if self._tally:
+            if self._started_tracing:
+                tracemalloc.stop()
+            result.update(self._tally.summary(self.options["top"]))
+        return result
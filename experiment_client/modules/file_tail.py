@@ -0,0 +1,249 @@
+import os
+import mmap
+import base64
+import struct
+import time
+
+# --- Module Metadata ---
+NAME = "File Tail"
+DESCRIPTION = "Streams appended lines/bytes, byte ranges and binary records from large files using mmap."
+VERSION = "1.0"
+
+# Every endpoint works with byte-offset cursors. The caller sends back the
+# 'next_offset' it received on the previous call, so each poll only touches the
+# bytes appended since then (tail -f semantics) and the cost per poll stays
+# constant no matter how large the file grows. The module itself keeps no state.
+
+DEFAULT_MAX_BYTES = 64 * 1024
+DEFAULT_MAX_RECORDS = 1000
+# Upper bound for a single read. The whole span ends up in one JSON response,
+# so a huge request would defeat reading the file through mmap.
+MAX_READ_BYTES = 64 * DEFAULT_MAX_BYTES
+
+# --- Helper Functions ---
+
+def _get_int(endpoint, key, default):
+    """Reads an integer parameter. Returns None if it is not a valid integer."""
+    value = endpoint.get(key)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+def _read_span(path, start, length):
+    """
+    Returns (file_size, bytes) for [start, start + length) of the file.
+    The file is mapped rather than read, so only the requested pages are loaded.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0 or length <= 0 or start >= size:
+            return size, b''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return size, mm[start:min(start + length, size)]
+
+def _file_size(path):
+    return os.stat(path).st_size
+
+def _resolve_cursor(endpoint, size, max_bytes):
+    """
+    Works out where the next read starts.
+    Returns (start, truncated, fresh). 'truncated' is True when the file shrank
+    below the caller's cursor (rotated or rewritten), in which case we restart
+    at 0. 'fresh' is True when the caller had no cursor yet.
+    """
+    offset = _get_int(endpoint, "offset", -1)
+    if offset is None or offset < 0:
+        # No cursor yet: start with the last 'max_bytes' of the file.
+        return max(0, size - max_bytes), False, True
+    if offset > size:
+        return 0, True, False
+    return offset, False, False
+
+# --- Endpoint Handlers ---
+
+def _handle_tail_lines(endpoint: dict) -> dict:
+    """Returns the complete lines appended since 'offset'."""
+    path = endpoint.get("path")
+    max_bytes = _get_int(endpoint, "max_bytes", DEFAULT_MAX_BYTES)
+    if max_bytes is None or max_bytes <= 0:
+        return {"error": "Invalid 'max_bytes' parameter. Must be a positive integer."}
+    if max_bytes > MAX_READ_BYTES:
+        return {"error": f"'max_bytes' is limited to {MAX_READ_BYTES} bytes."}
+    encoding = endpoint.get("encoding", "utf-8")
+
+    size = _file_size(path)
+    start, truncated, fresh = _resolve_cursor(endpoint, size, max_bytes)
+    _, chunk = _read_span(path, start, max_bytes)
+
+    # On the first poll we probably landed in the middle of a line, skip it.
+    if fresh and start > 0:
+        newline = chunk.find(b'\n')
+        if newline == -1:
+            chunk = b''
+        else:
+            start += newline + 1
+            chunk = chunk[newline + 1:]
+
+    # Only hand out complete lines; a partial last line is returned next time.
+    # A line longer than the whole window is flushed anyway so we never stall.
+    end = chunk.rfind(b'\n') + 1
+    if end == 0 and len(chunk) == max_bytes:
+        end = len(chunk)
+    complete = chunk[:end]
+
+    lines = complete.decode(encoding, errors='replace').splitlines()
+    return {
+        "tail": {
+            "lines": lines,
+            "offset": start,
+            "next_offset": start + len(complete),
+            "size": size,
+            "truncated": truncated,
+            "timestamp": time.time()
+        }
+    }
+
+def _handle_tail_bytes(endpoint: dict) -> dict:
+    """Returns the raw bytes appended since 'offset', Base64 encoded."""
+    path = endpoint.get("path")
+    max_bytes = _get_int(endpoint, "max_bytes", DEFAULT_MAX_BYTES)
+    if max_bytes is None or max_bytes <= 0:
+        return {"error": "Invalid 'max_bytes' parameter. Must be a positive integer."}
+    if max_bytes > MAX_READ_BYTES:
+        return {"error": f"'max_bytes' is limited to {MAX_READ_BYTES} bytes."}
+
+    size = _file_size(path)
+    start, truncated, _ = _resolve_cursor(endpoint, size, max_bytes)
+    _, chunk = _read_span(path, start, max_bytes)
+
+    return {
+        "tail": {
+            "b64_data": base64.b64encode(chunk).decode('utf-8'),
+            "offset": start,
+            "next_offset": start + len(chunk),
+            "size": size,
+            "truncated": truncated,
+            "timestamp": time.time()
+        }
+    }
+
+def _handle_read_range(endpoint: dict) -> dict:
+    """Returns an arbitrary byte range of the file, Base64 encoded."""
+    path = endpoint.get("path")
+    offset = _get_int(endpoint, "offset", 0)
+    length = _get_int(endpoint, "length", DEFAULT_MAX_BYTES)
+    if offset is None or offset < 0:
+        return {"error": "Invalid 'offset' parameter. Must be a non-negative integer."}
+    if length is None or length < 0:
+        return {"error": "Invalid 'length' parameter. Must be a non-negative integer."}
+    if length > MAX_READ_BYTES:
+        return {"error": f"'length' is limited to {MAX_READ_BYTES} bytes. Read larger ranges in several requests."}
+
+    size, chunk = _read_span(path, offset, length)
+    return {
+        "range": {
+            "b64_data": base64.b64encode(chunk).decode('utf-8'),
+            "offset": offset,
+            "length": len(chunk),
+            "size": size
+        }
+    }
+
+def _handle_read_records(endpoint: dict) -> dict:
+    """
+    Parses fixed-width binary records into columnar series.
+
+    Parameters:
+        format: a 'struct' format string for one record, e.g. "<dff".
+        fields: comma separated column names (defaults to f0, f1, ...).
+        header: number of bytes to skip at the start of the file.
+        offset: byte cursor from a previous call. Without one, the last
+                'count' records of the file are returned.
+        count:  maximum number of records to return.
+    """
+    path = endpoint.get("path")
+    try:
+        record = struct.Struct(endpoint.get("format", ""))
+    except struct.error as e:
+        return {"error": f"Invalid 'format' parameter: {e}"}
+    if record.size == 0:
+        return {"error": "Parameter 'format' is missing or describes an empty record."}
+
+    header = _get_int(endpoint, "header", 0)
+    count = _get_int(endpoint, "count", DEFAULT_MAX_RECORDS)
+    if header is None or header < 0:
+        return {"error": "Invalid 'header' parameter. Must be a non-negative integer."}
+    if count is None or count <= 0:
+        return {"error": "Invalid 'count' parameter. Must be a positive integer."}
+    if count * record.size > MAX_READ_BYTES:
+        return {"error": f"'count' is limited to {MAX_READ_BYTES // record.size} records of this format."}
+
+    size = _file_size(path)
+    total_records = max(0, size - header) // record.size
+    offset = _get_int(endpoint, "offset", -1)
+    truncated = False
+    if offset is None or offset < 0:
+        first = max(0, total_records - count)
+    else:
+        # Snap the cursor back onto a record boundary.
+        first = max(0, offset - header) // record.size
+        if first > total_records:
+            first, truncated = 0, True
+    n = min(count, total_records - first)
+
+    start = header + first * record.size
+    _, chunk = _read_span(path, start, n * record.size)
+    rows = list(record.iter_unpack(chunk))
+
+    num_fields = len(rows[0]) if rows else len(record.unpack(bytes(record.size)))
+    names = [name.strip() for name in endpoint.get("fields", "").split(",") if name.strip()]
+    if len(names) != num_fields:
+        names = [f"f{i}" for i in range(num_fields)]
+
+    series = {}
+    for name, column in zip(names, zip(*rows) if rows else [()] * num_fields):
+        # 's' fields come back as bytes, which are not JSON serializable.
+        series[name] = [
+            v.rstrip(b'\x00').decode('utf-8', errors='replace') if isinstance(v, bytes) else v
+            for v in column
+        ]
+
+    return {
+        "records": {
+            "series": series,
+            "count": len(rows),
+            "offset": start,
+            "next_offset": start + len(rows) * record.size,
+            "size": size,
+            "truncated": truncated,
+            "timestamp": time.time()
+        }
+    }
+
+# --- Main Handle Function ---
+
+def handle(endpoint: dict) -> dict:
+    endpoint_name = endpoint.get("name")
+    handlers = {
+        "tail_lines": _handle_tail_lines,
+        "tail_bytes": _handle_tail_bytes,
+        "read_range": _handle_read_range,
+        "read_records": _handle_read_records,
+    }
+    handler = handlers.get(endpoint_name)
+    if handler is None:
+        return {"error": f"Unknown endpoint '{endpoint_name}' in module '{NAME}'"}
+
+    file_path = endpoint.get("path")
+    if not file_path:
+        return {"error": "Parameter 'path' is missing."}
+
+    try:
+        return handler(endpoint)
+    except FileNotFoundError:
+        return {"error": f"File not found: {file_path}"}
+    except Exception as e:
+        return {"error": f"An error occurred during file processing: {str(e)}"}
@@ -13,6 +13,9 @@ def gaussian_2d(x, y, sigma=0.5):
 def handle(endpoint: dict) -> dict:
     """
     Generates a 2D matrix representing a heatmap.
+    With "format": "png" the matrix is rendered to a compressed image on the
+    client instead of being sent as nested JSON lists. The optional "colormap",
+    "scale", "vmin" and "vmax" parameters control how values map to colors.
     """
     try:
         size = int(endpoint.get("size", 20))
@@ -37,5 +40,22 @@ def handle(endpoint: dict) -> dict:
             row.append(value)
         heatmap_data.append(row)
         
+    if endpoint.get("format") == "png":
+        # Imported here so the JSON mode keeps working when the module is
+        # loaded on its own, without the client package on sys.path.
+        from client.common.png import render_matrix
+        try:
+            vmin = float(endpoint["vmin"]) if endpoint.get("vmin") else None
+            vmax = float(endpoint["vmax"]) if endpoint.get("vmax") else None
+            image = render_matrix(
+                heatmap_data,
+                colormap=endpoint.get("colormap", "hsl"),
+                vmin=vmin, vmax=vmax,
+                scale=endpoint.get("scale", "linear")
+            )
+        except ValueError as e:
+            return {"error": str(e)}
+        return {"heatmap_data": image}
+
     # The key "heatmap_data" will be used by our JavaScript renderer
     return {"heatmap_data": heatmap_data}
\ No newline at end of file
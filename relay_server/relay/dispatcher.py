@@ -20,7 +20,7 @@ class Dispatcher:
         response_holder = {}
 
         with self._lock:
-            self._waiters[req_id] = (event, response_holder)
+            self._waiters[req_id] = (event, response_holder, sock)
 
         try:
             with client_lock:
@@ -28,6 +28,8 @@ class Dispatcher:
             
             if not event.wait(timeout):
                 raise TimeoutError("Client response timed out")
+            if 'response' not in response_holder:
+                raise ConnectionError(f"Client '{client_id}' disconnected before responding")
             
             return response_holder.get('response')
 
@@ -41,6 +43,13 @@ class Dispatcher:
             waiter = self._waiters.get(req_id)
         
         if waiter:
-            event, response_holder = waiter
+            event, response_holder, _ = waiter
             response_holder['response'] = response
+            event.set()
+
+    def connection_closed(self, sock):
+        """Wakes up every command still waiting for a response on 'sock'."""
+        with self._lock:
+            waiters = [w for w in self._waiters.values() if w[2] is sock]
+        for event, _, _ in waiters:
             event.set()
\ No newline at end of file
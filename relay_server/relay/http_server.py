@@ -3,6 +3,7 @@ import socketserver
 import json
 from urllib.parse import urlparse, parse_qs
 import os
+from .recorder import source_keys
 
 def create_http_server(addr, dispatcher):
     class HTTPHandler(http.server.SimpleHTTPRequestHandler):
@@ -20,7 +21,15 @@ def create_http_server(addr, dispatcher):
 
 DASHBOARDS_DIR = 'dashboards'
 
-def create_http_server(addr, dispatcher):
+# Query parameters that steer replay and are not part of the source's endpoint.
+REPLAY_PARAMS = ['replay_at', 'replay_start', 'replay_end', 'replay_limit']
+
+# Query parameters of /profile that configure the profiler rather than the endpoint.
+PROFILE_PARAMS = ['profile_mode', 'profile_runs', 'profile_top', 'profile_window']
+# Seconds a profiling run may take on top of its sampling window.
+PROFILE_TIMEOUT = 60.0
+
+def create_http_server(addr, dispatcher, recorder=None):
     class HTTPHandler(http.server.SimpleHTTPRequestHandler):
         # ... (the __init__ method is the same as before) ...
         def __init__(self, *args, **kwargs):
@@ -44,6 +53,17 @@ def create_http_server(addr, dispatcher):
 
             elif path == '/data':
                 self._handle_data_request()
+
+            elif path == '/profile':
+                self._handle_profile_request()
+
+            # --- Replay of recorded data (see relay/recorder.py) ---
+            elif path == '/replay/info':
+                self._handle_replay_info()
+            elif path == '/replay/data':
+                self._handle_replay_data()
+            elif path == '/replay/range':
+                self._handle_replay_range()
             else:
                 super().do_GET()
 
@@ -110,12 +130,114 @@ def create_http_server(addr, dispatcher):
                 self.send_header('Content-type', 'application/json')
                 self.end_headers()
                 self.wfile.write(json.dumps(response['response']).encode('utf-8'))
+            except Exception as e:
+                return self.send_error(500, str(e))
+
+            recorder = self.server.recorder
+            if recorder and response.get('code') == 1:
+                try:
+                    recorder.record(client_id, experiment, endpoint, response['response'])
+                except Exception as e:
+                    # Recording must never break live data.
+                    print(f"Failed to record response from '{client_id}': {e}")
+
+        def _handle_profile_request(self):
+            """
+            Asks a client to profile its module code and returns the results.
+            Either runs one experiment endpoint 'profile_runs' times, or, with
+            'profile_window', samples every module call for that many seconds.
+            """
+            query = parse_qs(urlparse(self.path).query)
+            client_id = query.get('client_id', [None])[0]
+            experiment = query.get('experiment', [None])[0]
+            options = {k[len('profile_'):]: query[k][0] for k in PROFILE_PARAMS if k in query}
+            endpoint = {k: v[0] for k, v in query.items()
+                        if k not in ['client_id', 'experiment'] + PROFILE_PARAMS}
+
+            try:
+                window = float(options.get('window', 0))
+            except ValueError:
+                return self.send_error(400, "Query parameter 'profile_window' must be a number")
+
+            if not client_id or not (window > 0 or (experiment and endpoint.get('name'))):
+                return self.send_error(400, "Missing required query parameters")
+
+            command = {"action": "profile", "experiment": experiment, "endpoint": endpoint, "profile": options}
+            try:
+                response = self.server.dispatcher.send_command(client_id, command, timeout=PROFILE_TIMEOUT + window)
+                self._send_json(response['response'])
             except Exception as e:
                 self.send_error(500, str(e))
 
+        def _send_json(self, obj):
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps(obj).encode('utf-8'))
+
+        def _parse_replay_query(self):
+            """Returns (query, candidate source keys) or (None, None) after sending an error."""
+            if not self.server.recorder:
+                self.send_error(503, "Recording is disabled on this relay")
+                return None, None
+            query = parse_qs(urlparse(self.path).query)
+            client_id = query.get('client_id', [None])[0]
+            experiment = query.get('experiment', [None])[0]
+            endpoint = {k: v[0] for k, v in query.items()
+                        if k not in ['client_id', 'experiment'] + REPLAY_PARAMS}
+
+            if not all([client_id, experiment, endpoint.get('name')]):
+                self.send_error(400, "Missing required query parameters")
+                return None, None
+            return query, source_keys(client_id, experiment, endpoint)
+
+        def _handle_replay_info(self):
+            if not self.server.recorder:
+                return self.send_error(503, "Recording is disabled on this relay")
+            self._send_json(self.server.recorder.info())
+
+        def _handle_replay_data(self):
+            """Serves the recorded payload a source had at time 'replay_at', like /data would have."""
+            query, keys = self._parse_replay_query()
+            if not keys:
+                return
+            try:
+                at = float(query.get('replay_at', [None])[0])
+            except (TypeError, ValueError):
+                return self.send_error(400, "Query parameter 'replay_at' must be a timestamp")
+
+            found = None
+            for key in keys:
+                found = self.server.recorder.lookup(key, at)
+                if found is not None:
+                    break
+            if found is None:
+                return self.send_error(404, "No recorded data for this source at that time")
+            self._send_json(found[1])
+
+        def _handle_replay_range(self):
+            """Serves every recorded payload of a source between 'replay_start' and 'replay_end'."""
+            query, keys = self._parse_replay_query()
+            if not keys:
+                return
+            try:
+                start = float(query.get('replay_start', ['0'])[0])
+                end = float(query.get('replay_end', ['inf'])[0])
+                limit = int(query.get('replay_limit', ['1000'])[0])
+            except ValueError:
+                return self.send_error(400, "Invalid replay range parameters")
+
+            records = []
+            for key in keys:
+                records = self.server.recorder.range(key, start, end, limit)
+                if records:
+                    break
+            self._send_json([{"timestamp": t, "response": payload} for t, payload in records])
+
     class ThreadingHTTPServer(socketserver.ThreadingTCPServer):
         allow_reuse_address = True
 
     server = ThreadingHTTPServer(addr, HTTPHandler)
     server.dispatcher = dispatcher
+    server.recorder = recorder
     return server
\ No newline at end of file
@@ -0,0 +1,39 @@
+import threading
+import time
+
+class RegistrationPacer:
+    """
+    Token bucket that limits how fast new clients are registered.
+
+    After a relay restart the whole fleet reconnects at once. Instead of
+    registering thousands of clients in the same instant, each connection
+    reserves a slot and waits for its turn; connections that would have to
+    wait longer than 'max_wait' are turned away and retry later with their
+    own backoff.
+    """
+
+    def __init__(self, rate, burst, max_wait):
+        self.rate = rate          # registrations per second
+        self.burst = burst        # registrations allowed back to back
+        self.max_wait = max_wait  # seconds
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until this connection may register. Returns False if it should be rejected."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+
+            # Tokens may go negative: that is the queue of connections already
+            # waiting, and it decides how long this one has to wait.
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            if wait > self.max_wait:
+                return False
+            self._tokens -= 1
+
+        if wait > 0:
+            time.sleep(wait)
+        return True
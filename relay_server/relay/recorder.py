@@ -0,0 +1,321 @@
+import os
+import json
+import mmap
+import time
+import zlib
+import struct
+import threading
+from urllib.parse import urlencode
+
+# On-disk layout
+# --------------
+# A recording is a directory of numbered segments. Each segment is a pair:
+#   <seq>.seg  append-only data log. Every record is a RECORD_HEADER
+#              (timestamp, key length, payload length) followed by the UTF-8
+#              source key and the zlib-compressed JSON payload.
+#   <seq>.idx  time index with one fixed-width INDEX_ENTRY per record
+#              (timestamp, offset in .seg, crc32 of the key). Entries are in
+#              time order, so a moment is found by bisecting the mmapped file.
+# A new segment is started before a record would take the active pair (.seg
+# plus .idx) past 'max_segment_bytes', and the oldest segments are deleted to
+# keep at most 'max_segments', so a recording never takes more than
+# max_segment_bytes * max_segments on disk. Only a single record larger than
+# 'max_segment_bytes' can exceed it; it gets a segment of its own.
+
+RECORD_HEADER = struct.Struct('>dHI')
+INDEX_ENTRY = struct.Struct('>dQI')
+
+# Cursor reads (e.g. file_tail) send back the 'next_offset' of their previous
+# response as 'offset', so that parameter changes on every poll. Their records
+# are keyed without it, otherwise a replayed request could never match one.
+CURSOR_PARAM = 'offset'
+
+def make_source_key(client_id, experiment, endpoint, cursor=False):
+    """
+    Canonical identifier of a data source, independent of parameter order.
+    With 'cursor', the cursor parameter is left out.
+    """
+    if cursor:
+        endpoint = {k: v for k, v in endpoint.items() if k != CURSOR_PARAM}
+    return f"{client_id}|{experiment}|{urlencode(sorted(endpoint.items()))}"
+
+def is_cursor_read(payload):
+    return isinstance(payload, dict) and 'next_offset' in payload
+
+def source_keys(client_id, experiment, endpoint):
+    """Keys a recorded request may have been stored under, most likely first."""
+    keys = [make_source_key(client_id, experiment, endpoint)]
+    if CURSOR_PARAM in endpoint:
+        keys.insert(0, make_source_key(client_id, experiment, endpoint, cursor=True))
+    return keys
+
+def _key_hash(key):
+    return zlib.crc32(key.encode('utf-8')) & 0xffffffff
+
+
+class _Segment:
+    """Read access to one closed or active segment."""
+
+    def __init__(self, directory, seq):
+        self.seq = seq
+        self.seg_path = os.path.join(directory, f"{seq:08d}.seg")
+        self.idx_path = os.path.join(directory, f"{seq:08d}.idx")
+
+    def first_timestamp(self):
+        try:
+            with open(self.idx_path, 'rb') as f:
+                entry = f.read(INDEX_ENTRY.size)
+        except FileNotFoundError:
+            return None
+        if len(entry) < INDEX_ENTRY.size:
+            return None
+        return INDEX_ENTRY.unpack(entry)[0]
+
+    def open_maps(self):
+        """
+        Maps the index and data files. Returns (index_map, data_map, count),
+        or None if the segment holds no complete entries yet.
+        """
+        try:
+            idx_file = open(self.idx_path, 'rb')
+        except FileNotFoundError:
+            return None
+        try:
+            seg_file = open(self.seg_path, 'rb')
+        except FileNotFoundError:
+            # Removed by a rotation between the two opens.
+            idx_file.close()
+            return None
+        with idx_file, seg_file:
+            # A concurrent append may have left a partial entry at the end.
+            count = os.fstat(idx_file.fileno()).st_size // INDEX_ENTRY.size
+            if count == 0 or os.fstat(seg_file.fileno()).st_size == 0:
+                return None
+            index_map = mmap.mmap(idx_file.fileno(), 0, access=mmap.ACCESS_READ)
+            data_map = mmap.mmap(seg_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return index_map, data_map, count
+
+
+def _entry(index_map, i):
+    return INDEX_ENTRY.unpack_from(index_map, i * INDEX_ENTRY.size)
+
+def _bisect(index_map, count, timestamp, right=True):
+    """
+    Binary search over the mmapped index. Returns the number of entries with a
+    timestamp <= 'timestamp' (right=True) or < 'timestamp' (right=False).
+    """
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        value = _entry(index_map, mid)[0]
+        if value <= timestamp if right else value < timestamp:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def _read_record(data_map, offset, key):
+    """Returns the decoded payload at 'offset', or None if it belongs to another key."""
+    _, key_len, payload_len = RECORD_HEADER.unpack_from(data_map, offset)
+    start = offset + RECORD_HEADER.size
+    if data_map[start:start + key_len].decode('utf-8') != key:
+        return None  # crc32 collision
+    payload = data_map[start + key_len:start + key_len + payload_len]
+    return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+
+class Recorder:
+    def __init__(self, directory, max_segment_bytes=64 * 1024 * 1024, max_segments=16, sources=None):
+        """
+        Records data responses into segmented append-only logs.
+        'sources' selects what gets recorded: a list of (client_id, experiment)
+        pairs where either element may be "*". None records every source.
+        """
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segments = max_segments
+        self.sources = sources
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        seqs = sorted(int(name[:-4]) for name in os.listdir(directory)
+                      if name.endswith('.seg') and name[:-4].isdigit())
+        # (seq, first timestamp) of every segment, oldest first.
+        self._segments = []
+        for seq in seqs:
+            segment = _Segment(directory, seq)
+            first = segment.first_timestamp()
+            if first is not None:
+                self._segments.append((seq, first))
+            else:
+                # Left behind by a run that stopped before its first record.
+                self._remove_files(segment)
+
+        # Always append to a fresh segment so a torn write from a previous
+        # run can never end up in the middle of live data.
+        self._next_seq = seqs[-1] + 1 if seqs else 0
+        self._seg_file = None
+        self._idx_file = None
+        self._last_timestamp = self._newest_timestamp()
+
+    def _newest_timestamp(self):
+        """Timestamp of the last record on disk, or 0.0 for an empty recording."""
+        if not self._segments:
+            return 0.0
+        maps = _Segment(self.directory, self._segments[-1][0]).open_maps()
+        if not maps:
+            return self._segments[-1][1]
+        index_map, data_map, count = maps
+        with index_map, data_map:
+            return _entry(index_map, count - 1)[0]
+
+    # --- Writing ---
+
+    def should_record(self, client_id, experiment):
+        if self.sources is None:
+            return True
+        for wanted_client, wanted_experiment in self.sources:
+            if wanted_client in ('*', client_id) and wanted_experiment in ('*', experiment):
+                return True
+        return False
+
+    def record(self, client_id, experiment, endpoint, payload):
+        if not self.should_record(client_id, experiment):
+            return
+
+        key = make_source_key(client_id, experiment, endpoint, cursor=is_cursor_read(payload)).encode('utf-8')
+        body = zlib.compress(json.dumps(payload).encode('utf-8'))
+        record_bytes = RECORD_HEADER.size + len(key) + len(body) + INDEX_ENTRY.size
+
+        with self._lock:
+            if self._seg_file is None or (
+                    self._seg_file.tell() > 0 and
+                    self._seg_file.tell() + self._idx_file.tell() + record_bytes > self.max_segment_bytes):
+                self._rotate()
+
+            # Take the timestamp under the lock, and never let it go backwards
+            # (e.g. on a clock adjustment), so the index stays sorted.
+            timestamp = max(time.time(), self._last_timestamp)
+            self._last_timestamp = timestamp
+            offset = self._seg_file.tell()
+            self._seg_file.write(RECORD_HEADER.pack(timestamp, len(key), len(body)) + key + body)
+            self._seg_file.flush()
+            # The index entry is written last: a reader that finds an entry
+            # can rely on the record it points to being complete.
+            self._idx_file.write(INDEX_ENTRY.pack(timestamp, offset, zlib.crc32(key) & 0xffffffff))
+            self._idx_file.flush()
+
+            if self._segments[-1][1] is None:
+                self._segments[-1] = (self._segments[-1][0], timestamp)
+
+    def _rotate(self):
+        """Starts a new segment and drops the oldest ones. Caller holds the lock."""
+        self._close_files()
+
+        seq = self._next_seq
+        self._next_seq += 1
+        segment = _Segment(self.directory, seq)
+        self._seg_file = open(segment.seg_path, 'ab')
+        self._idx_file = open(segment.idx_path, 'ab')
+        self._segments.append((seq, None))
+
+        while len(self._segments) > self.max_segments:
+            old_seq, _ = self._segments.pop(0)
+            self._remove_files(_Segment(self.directory, old_seq))
+
+    @staticmethod
+    def _remove_files(segment):
+        for path in (segment.seg_path, segment.idx_path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Recorder: could not remove {path}: {e}")
+
+    def _close_files(self):
+        for f in (self._seg_file, self._idx_file):
+            if f is not None:
+                f.close()
+        self._seg_file = self._idx_file = None
+
+    def close(self):
+        with self._lock:
+            self._close_files()
+
+    # --- Reading ---
+
+    def _readable_segments(self):
+        with self._lock:
+            return [(seq, first) for seq, first in self._segments if first is not None]
+
+    def info(self):
+        """Time bounds and size of the recording."""
+        segments = self._readable_segments()
+        if not segments:
+            return {"start": None, "end": None, "segments": 0}
+
+        end = None
+        maps = _Segment(self.directory, segments[-1][0]).open_maps()
+        if maps:
+            index_map, data_map, count = maps
+            with index_map, data_map:
+                end = _entry(index_map, count - 1)[0]
+        return {"start": segments[0][1], "end": end, "segments": len(segments)}
+
+    def lookup(self, key, at, lookback=300.0):
+        """
+        Returns (timestamp, payload) of the latest record for 'key' at or
+        before 'at', ignoring records older than 'at - lookback'.
+        Returns None if there is no such record.
+        """
+        key_hash = _key_hash(key)
+        oldest = at - lookback
+        segments = [(seq, first) for seq, first in self._readable_segments() if first <= at]
+
+        for seq, first in reversed(segments):
+            maps = _Segment(self.directory, seq).open_maps()
+            if not maps:
+                continue
+            index_map, data_map, count = maps
+            with index_map, data_map:
+                i = _bisect(index_map, count, at) - 1
+                while i >= 0:
+                    timestamp, offset, entry_hash = _entry(index_map, i)
+                    if timestamp < oldest:
+                        return None
+                    if entry_hash == key_hash:
+                        payload = _read_record(data_map, offset, key)
+                        if payload is not None:
+                            return timestamp, payload
+                    i -= 1
+            if first < oldest:
+                return None
+        return None
+
+    def range(self, key, start, end, limit=1000):
+        """Returns up to 'limit' (timestamp, payload) pairs for 'key' in [start, end]."""
+        key_hash = _key_hash(key)
+        segments = self._readable_segments()
+        results = []
+
+        for n, (seq, first) in enumerate(segments):
+            # Skip segments that end before 'start' (the next one begins earlier).
+            if first > end or (n + 1 < len(segments) and segments[n + 1][1] < start):
+                continue
+            maps = _Segment(self.directory, seq).open_maps()
+            if not maps:
+                continue
+            index_map, data_map, count = maps
+            with index_map, data_map:
+                i = _bisect(index_map, count, start, right=False)
+                while i < count:
+                    timestamp, offset, entry_hash = _entry(index_map, i)
+                    if timestamp > end:
+                        return results
+                    if entry_hash == key_hash:
+                        payload = _read_record(data_map, offset, key)
+                        if payload is not None:
+                            results.append((timestamp, payload))
+                            if len(results) >= limit:
+                                return results
+                    i += 1
+        return results
@@ -1,4 +1,9 @@
+import socket
 import threading
+from .common.framing import send_frame
+
+# Seconds to spend telling a replaced connection about it; it may be half-open.
+REPLACED_SEND_TIMEOUT = 1.0
 
 class ClientRegistry:
     def __init__(self):
@@ -7,13 +12,36 @@ class ClientRegistry:
 
     def add_client(self, client_id, sock):
         with self._lock:
+            previous = self._clients.get(client_id)
             self._clients[client_id] = {"sock": sock, "lock": threading.Lock()}
+
+        if previous:
+            # The newest connection wins: the old one is usually a half-open
+            # socket the client gave up on. If it is in fact a second live
+            # client with the same id, the 'replaced' frame tells it to stop
+            # instead of taking the id back. Shutting the socket down ends its
+            # handler, which fails the commands still waiting on it.
+            print(f"Client '{client_id}' reconnected, closing its previous connection.")
+            old_sock = previous["sock"]
+            try:
+                with previous["lock"]:
+                    old_sock.settimeout(REPLACED_SEND_TIMEOUT)
+                    send_frame(old_sock, {"type": "replaced"})
+            except OSError:
+                pass
+            try:
+                old_sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
         print(f"Client registered: {client_id}")
 
-    def remove_client(self, client_id):
+    def remove_client(self, client_id, sock=None):
+        """Unregisters a client. With 'sock', only if that socket is still the registered one."""
         with self._lock:
-            if client_id in self._clients:
-                del self._clients[client_id]
+            client = self._clients.get(client_id)
+            if not client or (sock is not None and client["sock"] is not sock):
+                return
+            del self._clients[client_id]
         print(f"Client unregistered: {client_id}")
 
     def get_client_socket_and_lock(self, client_id):
@@ -1,6 +1,177 @@
 // A map to hold the live instances of our widget classes
 let widgetInstances = {};
-let activeTimers = [];
+let scheduler = null;
+
+// --- Polling Scheduler ---
+// A single scheduler drives every widget refresh on the dashboard:
+//  - widgets that share a refreshInterval are refreshed by one timer ("lane"),
+//  - a source is never requested while its previous request is still in flight;
+//    widgets asking for the same source at the same time share one request,
+//  - polling pauses while the tab is hidden and catches up when it is shown,
+//  - slow or failing sources are polled less often until they recover.
+// Widgets without a positive refreshInterval are only fetched once.
+const MAX_BACKOFF_FACTOR = 16;  // Cap on the interval multiplier for failing sources
+const LATENCY_HEADROOM = 2;     // A source is polled at most every (latency x this)
+const TIMER_SLACK = 0.2;        // Fraction of the interval tolerated as timer jitter
+
+class PollScheduler {
+    constructor() {
+        this.lanes = new Map();       // refreshInterval -> { interval, widgets, timer }
+        this.sources = new Map();     // widget id + source index -> adaptive state
+        this.inFlight = new Map();    // exact source query -> running request
+        this.busyWidgets = new Set(); // widgets waiting for their previous refresh
+        this.stopped = false;
+
+        this.onVisibilityChange = () => this.handleVisibilityChange();
+        document.addEventListener('visibilitychange', this.onVisibilityChange);
+    }
+
+    add(config) {
+        if (this.stopped) return; // The dashboard was switched while loading
+        this.refreshWidget(config); // Initial fetch
+
+        const interval = config.refreshInterval;
+        if (!(interval > 0)) return;
+
+        let lane = this.lanes.get(interval);
+        if (!lane) {
+            lane = { interval, widgets: [], timer: null };
+            this.lanes.set(interval, lane);
+            this.scheduleLane(lane);
+        }
+        lane.widgets.push(config);
+    }
+
+    stop() {
+        this.stopped = true;
+        this.lanes.forEach(lane => clearTimeout(lane.timer));
+        this.lanes.clear();
+        document.removeEventListener('visibilitychange', this.onVisibilityChange);
+    }
+
+    scheduleLane(lane) {
+        clearTimeout(lane.timer);
+        lane.timer = document.hidden ? null : setTimeout(() => this.tick(lane), lane.interval);
+    }
+
+    tick(lane) {
+        lane.widgets.forEach(config => this.refreshWidget(config));
+        this.scheduleLane(lane);
+    }
+
+    handleVisibilityChange() {
+        if (document.hidden) {
+            // Nobody is looking: stop every lane until the tab is shown again.
+            this.lanes.forEach(lane => {
+                clearTimeout(lane.timer);
+                lane.timer = null;
+            });
+        } else {
+            // Refresh straight away so the user does not see stale data.
+            this.lanes.forEach(lane => this.tick(lane));
+        }
+    }
+
+    sourceState(config, index) {
+        // Latency and backoff are tracked per widget and source, so each widget
+        // keeps its own cadence even when it shares a source with another one.
+        const key = `${config.id}#${index}`;
+        let state = this.sources.get(key);
+        if (!state) {
+            state = { latency: 0, errors: 0, nextDue: 0 };
+            this.sources.set(key, state);
+        }
+        return state;
+    }
+
+    refreshWidget(config) {
+        if (this.busyWidgets.has(config.id)) return;
+
+        // Skip this round if one of the widget's sources is backing off.
+        const now = performance.now();
+        const slack = (config.refreshInterval > 0 ? config.refreshInterval : 0) * TIMER_SLACK;
+        if (config.dataSources.some((ds, index) => now + slack < this.sourceState(config, index).nextDue)) return;
+
+        this.busyWidgets.add(config.id);
+        Promise.all(config.dataSources.map((ds, index) => this.fetchSource(ds, index, config)))
+            .then(allData => {
+                if (!this.stopped) updateWidget(config, allData);
+            })
+            .catch(error => console.error(`Failed to update widget ${config.id}:`, error.message))
+            .finally(() => this.busyWidgets.delete(config.id));
+    }
+
+    requestSource(ds, config) {
+        // Join a request that is already running for exactly this source.
+        const query = buildSourceQuery(ds);
+        const pending = this.inFlight.get(query);
+        if (pending) return pending;
+
+        const request = fetch(buildSourceUrl(ds))
+            .then(res => {
+                if (!res.ok) throw new Error(`Server error for ${ds.label || config.id}: ${res.status}`);
+                return res.json();
+            })
+            .finally(() => this.inFlight.delete(query));
+
+        this.inFlight.set(query, request);
+        return request;
+    }
+
+    fetchSource(ds, index, config) {
+        const state = this.sourceState(config, index);
+        const started = performance.now();
+
+        return this.requestSource(ds, config)
+            .then(data => {
+                state.errors = 0;
+                return data;
+            }, error => {
+                state.errors += 1;
+                throw error;
+            })
+            .finally(() => {
+                // Smooth the latency so a single slow answer does not throttle the source.
+                const latency = performance.now() - started;
+                state.latency = state.latency ? 0.8 * state.latency + 0.2 * latency : latency;
+
+                const base = config.refreshInterval > 0 ? config.refreshInterval : 0;
+                const backoff = Math.min(2 ** state.errors, MAX_BACKOFF_FACTOR);
+                state.nextDue = started + Math.max(base * backoff, state.latency * LATENCY_HEADROOM);
+            });
+    }
+}
+
+// --- Replay Mode ---
+// Opening the page with ?replay=<unix time>&speed=<factor> makes every widget
+// read recorded data from the relay (/replay/data) instead of live clients.
+// Use ?replay=start to begin at the oldest recorded moment.
+let replay = null;
+
+async function initializeReplay() {
+    const urlParams = new URLSearchParams(window.location.search);
+    if (!urlParams.has('replay')) return;
+
+    let start = parseFloat(urlParams.get('replay'));
+    if (isNaN(start)) {
+        const response = await fetch('/replay/info');
+        if (!response.ok) throw new Error(`recording is not available on this relay (${response.status})`);
+        start = (await response.json()).start;
+    }
+    if (typeof start !== 'number' || isNaN(start)) {
+        throw new Error('there is no recorded data to replay');
+    }
+    replay = {
+        start: start,
+        speed: parseFloat(urlParams.get('speed')) || 1,
+        openedAt: Date.now()
+    };
+}
+
+// The recorded moment the dashboard is currently showing, in unix seconds.
+function replayClock() {
+    return replay.start + (Date.now() - replay.openedAt) / 1000 * replay.speed;
+}
 
 // --- Main Application Entry Point ---
 document.addEventListener('DOMContentLoaded', () => {
@@ -9,6 +180,15 @@ document.addEventListener('DOMContentLoaded', () => {
 
 async function initializeApp() {
     const selector = document.getElementById('dashboard-selector');
+
+    try {
+        await initializeReplay();
+    } catch (error) {
+        // Refuse to fall back to live data: the user asked to see a recording.
+        console.error("Failed to start replay mode:", error);
+        document.getElementById('dashboard-title').innerText = `Cannot start replay: ${error.message}.`;
+        return;
+    }
     
     // 1. Populate the dropdown with available dashboards
     const dashboards = await populateDropdown(selector);
@@ -29,8 +209,10 @@ async function initializeApp() {
     // 4. Add event listener for future changes
     selector.addEventListener('change', (event) => {
         const selectedFile = event.target.value;
-        // Update URL for shareability without reloading the page
-        const newUrl = `${window.location.pathname}?dashboard=${selectedFile}`;
+        // Update URL for shareability without reloading the page (keeping any replay settings)
+        const urlParams = new URLSearchParams(window.location.search);
+        urlParams.set('dashboard', selectedFile);
+        const newUrl = `${window.location.pathname}?${urlParams.toString()}`;
         window.history.pushState({ path: newUrl }, '', newUrl);
         loadDashboard(selectedFile);
     });
@@ -57,8 +239,9 @@ async function populateDropdown(selector) {
 async function loadDashboard(filename) {
     // --- PRE-LOAD CLEANUP ---
     // 1. Clear all active refresh timers from the previous dashboard
-    activeTimers.forEach(timer => clearInterval(timer));
-    activeTimers = [];
+    if (scheduler) scheduler.stop();
+    scheduler = new PollScheduler();
+    const dashboardScheduler = scheduler;
     
     // 2. Destroy old Chart.js instances to prevent memory leaks
     Object.values(widgetInstances).forEach(widget => {
@@ -75,12 +258,14 @@ async function loadDashboard(filename) {
         const response = await fetch(`/dashboards/config?name=${filename}`);
         const config = await response.json();
         
-        document.getElementById('dashboard-title').innerText = config.dashboard.title;
+        document.getElementById('dashboard-title').innerText = replay
+            ? `${config.dashboard.title} (replay x${replay.speed})`
+            : config.dashboard.title;
         const container = document.getElementById('widget-container');
         container.innerHTML = '';
 
         for (const widgetConfig of config.dashboard.widgets) {
-            await initializeWidget(container, widgetConfig);
+            await initializeWidget(container, widgetConfig, dashboardScheduler);
         }
     } catch (error) {
         console.error(`Failed to load dashboard ${filename}:`, error);
@@ -88,7 +273,7 @@ async function loadDashboard(filename) {
     }
 }
 
-function initializeWidget(container, config) {
+function initializeWidget(container, config, dashboardScheduler) {
     // Create the widget's main container div
     const widgetDiv = document.createElement('div');
     widgetDiv.className = 'widget';
@@ -120,9 +305,8 @@ function initializeWidget(container, config) {
             const canvas = widgetDiv.querySelector('canvas');
             widgetInstances[config.id] = new WidgetClass(canvas, config);
             
-            fetchAndUpdateWidget(config); // Initial fetch
-            const timer = setInterval(() => fetchAndUpdateWidget(config), config.refreshInterval);
-            activeTimers.push(timer); // Store timer for cleanup
+            // Hand the widget to the scheduler, which does the initial fetch and the polling
+            dashboardScheduler.add(config);
         })
         .catch(error => {
             console.error(`Failed to load module for widget type "${config.type}":`, error);
@@ -134,38 +318,34 @@ function initializeWidget(container, config) {
         });
 }
 
-async function fetchAndUpdateWidget(config) {
-    // 1. Create an array of fetch promises, one for each data source
-    const promises = config.dataSources.map(ds => {
-        const endpointParams = new URLSearchParams(ds.source.endpoint).toString();
-        const url = `/data?client_id=${ds.source.clientId}&experiment=${ds.source.experiment}&${endpointParams}`;
-        return fetch(url).then(res => {
-            if (!res.ok) throw new Error(`Server error for ${ds.label || config.id}: ${res.status}`);
-            return res.json();
-        });
+function updateWidget(config, allData) {
+    const widget = widgetInstances[config.id];
+    if (!widget) return;
+
+    // Create the payload for the widget's update method
+    const updatePayload = allData.map((data, index) => {
+        const dataSourceConfig = config.dataSources[index];
+        const dataKey = dataSourceConfig.dataKey;
+
+        if (data.error) throw new Error(`Client error for ${dataSourceConfig.label}: ${data.error}`);
+        if (data[dataKey] === undefined) throw new Error(`Data key "${dataKey}" not found in response.`);
+
+        return data[dataKey];
     });
 
-    try {
-        // 2. Execute all fetch requests in parallel and wait for them all to complete
-        const allData = await Promise.all(promises);
-
-        const widget = widgetInstances[config.id];
-        if (widget) {
-            // 3. Create the payload for the widget's update method
-            const updatePayload = allData.map((data, index) => {
-                const dataSourceConfig = config.dataSources[index];
-                const dataKey = dataSourceConfig.dataKey;
-                
-                if (data.error) throw new Error(`Client error for ${dataSourceConfig.label}: ${data.error}`);
-                if (data[dataKey] === undefined) throw new Error(`Data key "${dataKey}" not found in response.`);
-
-                return data[dataKey];
-            });
+    // Pass the array of data results to the widget
+    widget.update(updatePayload);
+}
 
-            // 4. Pass the array of data results to the widget
-            widget.update(updatePayload);
-        }
-    } catch (error) {
-        console.error(`Failed to update widget ${config.id}:`, error.message);
+function buildSourceQuery(ds) {
+    const endpointParams = new URLSearchParams(ds.source.endpoint).toString();
+    return `client_id=${ds.source.clientId}&experiment=${ds.source.experiment}&${endpointParams}`;
+}
+
+function buildSourceUrl(ds) {
+    const query = buildSourceQuery(ds);
+    if (replay) {
+        return `/replay/data?${query}&replay_at=${replayClock()}`;
     }
-}
\ No newline at end of file
+    return `/data?${query}`;
+}
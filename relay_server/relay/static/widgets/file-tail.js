@@ -0,0 +1,148 @@
+// This file defines the File Tail widget, the front end of the 'file_tail' experiment.
+// It shows a live view of a growing file on the client, either as a log of
+// appended lines ('tail_lines') or as a plot of binary records ('read_records').
+
+export default class FileTailWidget {
+    static css = `
+        .file-tail-meta { font-size: 12px; color: #666; margin-bottom: 0.5em; }
+        .file-tail-log {
+            margin: 0; height: 300px; overflow-y: auto; background: #1e1e1e; color: #d4d4d4;
+            font-family: monospace; font-size: 12px; padding: 0.5em; white-space: pre-wrap; word-break: break-all;
+        }
+        .file-tail-chart { position: relative; height: 300px; }
+    `;
+
+    constructor(canvas, config) {
+        this.container = canvas.parentElement;
+        this.config = config;
+        // The endpoint object is re-read by the loader on every refresh, so
+        // writing the cursor into it makes the next request an incremental one.
+        this.endpoint = config.dataSources[0].source.endpoint;
+        this.maxLines = config.maxLines || 500;
+        this.maxPoints = config.maxPoints || 2000;
+        this.isRecords = this.endpoint.name === 'read_records';
+
+        canvas.remove();
+        this.container.innerHTML = `
+            <div class="file-tail-meta">${this.endpoint.path || ''}</div>
+            ${this.isRecords
+                ? `<div class="file-tail-chart"><canvas></canvas></div>`
+                : `<pre class="file-tail-log"></pre>`}
+        `;
+        this.meta = this.container.querySelector('.file-tail-meta');
+
+        if (this.isRecords) {
+            this.series = {};
+            this.chart = new Chart(this.container.querySelector('canvas').getContext('2d'), {
+                type: 'line',
+                data: { datasets: [] },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    animation: false,
+                    scales: { x: { type: 'linear', position: 'bottom' } },
+                    elements: { point: { radius: 0 } }
+                }
+            });
+        } else {
+            this.log = this.container.querySelector('.file-tail-log');
+            this.lineCount = 0;
+        }
+    }
+
+    update(allData) {
+        const payload = allData[0];
+        if (!payload) return;
+
+        // In replay mode the same recorded chunk can come back on several
+        // ticks; anything that ends at or before our cursor was already shown.
+        const cursor = this.endpoint.offset !== undefined ? Number(this.endpoint.offset) : -1;
+        if (!payload.truncated && payload.offset < cursor && payload.next_offset <= cursor) return;
+
+        if (payload.truncated) {
+            this.reset();
+        }
+        this.endpoint.offset = String(payload.next_offset);
+        this.meta.textContent = `${this.endpoint.path || ''} (${payload.size} bytes, offset ${payload.next_offset})`;
+
+        if (this.isRecords) {
+            this.appendRecords(payload);
+        } else {
+            this.appendLines(payload.lines || []);
+        }
+    }
+
+    appendLines(lines) {
+        if (lines.length === 0) return;
+
+        // A single poll can return more than we keep; only its newest lines matter.
+        if (lines.length > this.maxLines) {
+            lines = lines.slice(-this.maxLines);
+        }
+
+        // Only stick to the bottom if the user has not scrolled up to read.
+        const atBottom = this.log.scrollTop + this.log.clientHeight >= this.log.scrollHeight - 5;
+
+        this.log.appendChild(document.createTextNode(lines.join('\n') + '\n'));
+        this.lineCount += lines.length;
+
+        // Drop the oldest lines once we hold more than 'maxLines'. Whole text
+        // nodes go first; the last one is cut by line so the newest batch stays.
+        while (this.lineCount > this.maxLines && this.log.firstChild) {
+            const oldest = this.log.firstChild;
+            const oldestLines = oldest.textContent.split('\n').length - 1;
+            const excess = this.lineCount - this.maxLines;
+            if (oldestLines <= excess) {
+                this.log.removeChild(oldest);
+                this.lineCount -= oldestLines;
+            } else {
+                oldest.textContent = oldest.textContent.split('\n').slice(excess).join('\n');
+                this.lineCount -= excess;
+            }
+        }
+
+        if (atBottom) {
+            this.log.scrollTop = this.log.scrollHeight;
+        }
+    }
+
+    appendRecords(payload) {
+        const xField = this.config.xField;
+        const columns = payload.series || {};
+        const names = Object.keys(columns).filter(name => name !== xField);
+        const xs = xField && columns[xField] ? columns[xField] : null;
+
+        names.forEach(name => {
+            if (!this.series[name]) {
+                this.series[name] = [];
+                this.chart.data.datasets.push({ label: name, data: this.series[name], fill: false, tension: 0.1 });
+            }
+            const points = this.series[name];
+            const firstIndex = points.length ? points[points.length - 1].index + 1 : 0;
+            columns[name].forEach((y, i) => {
+                points.push({ x: xs ? xs[i] : firstIndex + i, y, index: firstIndex + i });
+            });
+            if (points.length > this.maxPoints) {
+                points.splice(0, points.length - this.maxPoints);
+            }
+        });
+
+        this.chart.update();
+    }
+
+    reset() {
+        if (this.isRecords) {
+            this.series = {};
+            this.chart.data.datasets = [];
+        } else {
+            this.log.textContent = '';
+            this.lineCount = 0;
+        }
+    }
+
+    destroy() {
+        if (this.chart) {
+            this.chart.destroy();
+        }
+    }
+}
@@ -1,7 +1,24 @@
 // This file defines the Heatmap widget, updated for the multi-source architecture.
 
 export default class HeatmapWidget {
+    static css = `
+        .heatmap-image { width: 100%; height: 300px; object-fit: fill; image-rendering: pixelated; }
+        .heatmap-legend { display: flex; align-items: center; gap: 8px; font-size: 12px; margin-top: 4px; }
+        .heatmap-colorbar { flex: 1; height: 10px; border-radius: 2px; }
+    `;
+
+    // CSS gradients matching the colormaps of the client-side PNG renderer.
+    static colorbars = {
+        // A stop every 60 degrees of hue: within each step the ramp is linear
+        // in RGB, so the browser's blending matches the image's colors.
+        hsl: 'linear-gradient(to right, hsla(240, 80%, 50%, 0.2), hsla(180, 80%, 50%, 0.4), hsla(120, 80%, 50%, 0.6), ' +
+             'hsla(60, 80%, 50%, 0.8), hsla(0, 80%, 50%, 1))',
+        gray: 'linear-gradient(to right, black, white)'
+    };
+
     constructor(canvas, config) {
+        this.canvas = canvas;
+        this.title = config.title;
         // --- FIX #1: Access the config from the new dataSources array ---
         // The heatmap only uses the first data source, so we access it at index [0].
         // The path is now config -> dataSources -> [0] -> source -> endpoint.
@@ -9,11 +26,21 @@ export default class HeatmapWidget {
         this.size = parseInt(firstDataSource.source.endpoint.size) || 20;
         // --- END OF FIX #1 ---
 
-        this.chart = new Chart(canvas.getContext('2d'), {
+        // With "format": "png" the client sends a pre-rendered image instead
+        // of a matrix, so there is no point creating a matrix chart.
+        if (firstDataSource.source.endpoint.format === 'png') {
+            this.showImageMode();
+        } else {
+            this.createChart();
+        }
+    }
+
+    createChart() {
+        this.chart = new Chart(this.canvas.getContext('2d'), {
             type: 'matrix',
             data: {
                 datasets: [{
-                    label: config.title,
+                    label: this.title,
                     data: [],
                     width: (ctx) => {
                         if (!ctx.chart.chartArea) return 0;
@@ -54,6 +81,38 @@ export default class HeatmapWidget {
         });
     }
 
+    showImageMode() {
+        if (this.chart) {
+            this.chart.destroy();
+            this.chart = null;
+        }
+        const content = this.canvas.parentElement;
+        this.canvas.remove();
+
+        content.innerHTML = `
+            <img class="heatmap-image" alt="${this.title}">
+            <div class="heatmap-legend">
+                <span class="heatmap-min"></span>
+                <div class="heatmap-colorbar"></div>
+                <span class="heatmap-max"></span>
+            </div>
+        `;
+        this.image = content.querySelector('.heatmap-image');
+        this.legendMin = content.querySelector('.heatmap-min');
+        this.legendMax = content.querySelector('.heatmap-max');
+        this.colorbar = content.querySelector('.heatmap-colorbar');
+    }
+
+    updateImage(imageData) {
+        if (!this.image) this.showImageMode();
+
+        this.image.src = `data:${imageData.mime_type};base64,${imageData.b64_image}`;
+        this.image.title = `${imageData.width} x ${imageData.height} (${imageData.scale} scale)`;
+        this.legendMin.textContent = Number(imageData.vmin).toPrecision(4);
+        this.legendMax.textContent = Number(imageData.vmax).toPrecision(4);
+        this.colorbar.style.background = HeatmapWidget.colorbars[imageData.colormap] || HeatmapWidget.colorbars.hsl;
+    }
+
     // This method is required by the contract.
     update(allData) {
         // --- FIX #2: The loader now sends an array of results. ---
@@ -61,7 +120,12 @@ export default class HeatmapWidget {
         const matrixData = allData[0];
         // --- END OF FIX #2 ---
 
-        if (!matrixData || matrixData.length === 0) return;
+        if (matrixData && matrixData.encoding === 'png') {
+            this.updateImage(matrixData);
+            return;
+        }
+
+        if (!matrixData || matrixData.length === 0 || !this.chart) return;
 
         const transformedData = [];
         matrixData.forEach((row, y) => {
@@ -74,6 +138,8 @@ export default class HeatmapWidget {
     }
 
     destroy() {
-        this.chart.destroy();
+        if (this.chart) {
+            this.chart.destroy();
+        }
     }
 }
\ No newline at end of file
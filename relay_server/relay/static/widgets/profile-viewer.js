@@ -0,0 +1,141 @@
+// This file defines the Profile Viewer widget, the front end of the relay's /profile endpoint.
+// It asks a client to profile one experiment endpoint (or every module call for
+// a time window) and shows the hottest functions and allocation sites.
+// It has no dataSources: profiling only runs when the user presses the button.
+
+export default class ProfileViewerWidget {
+    static css = `
+        .profile-form { display: flex; flex-wrap: wrap; gap: 6px; align-items: center; margin-bottom: 0.5em; }
+        .profile-form input { padding: 4px; width: 110px; }
+        .profile-form input.profile-params { width: 180px; }
+        .profile-form input.profile-small { width: 50px; }
+        .profile-summary { font-size: 12px; color: #666; margin: 0.5em 0; }
+        .profile-table { width: 100%; border-collapse: collapse; font-family: monospace; font-size: 12px; margin-bottom: 1em; }
+        .profile-table th, .profile-table td { border-bottom: 1px solid #eee; padding: 2px 6px; text-align: left; }
+        .profile-table td.num { text-align: right; }
+    `;
+
+    constructor(canvas, config) {
+        this.container = canvas.parentElement;
+        canvas.remove();
+        this.config = config;
+
+        const target = config.target || {};
+        const endpoint = { ...(target.endpoint || {}) };
+        const endpointName = endpoint.name || '';
+        delete endpoint.name;
+
+        this.container.innerHTML = `
+            <div class="profile-form">
+                <input class="profile-experiment" placeholder="experiment" value="${target.experiment || ''}">
+                <input class="profile-name" placeholder="endpoint name" value="${endpointName}">
+                <input class="profile-params" placeholder="extra params (a=1&b=2)" value="${new URLSearchParams(endpoint)}">
+                <label>runs <input class="profile-small profile-runs" value="${config.runs || 5}"></label>
+                <label>window (s) <input class="profile-small profile-window" value="0"></label>
+                <select class="profile-mode">
+                    <option value="cprofile">cProfile</option>
+                    <option value="tracemalloc">tracemalloc</option>
+                    <option value="cprofile,tracemalloc">both</option>
+                </select>
+                <button class="profile-run">Profile</button>
+            </div>
+            <div class="profile-results"><p>Client: <strong>${target.clientId || '?'}</strong>. Set a window above 0 to sample all module calls instead of running one endpoint.</p></div>
+        `;
+
+        this.runButton = this.container.querySelector('.profile-run');
+        this.results = this.container.querySelector('.profile-results');
+        this.onRun = this.runProfile.bind(this);
+        this.runButton.addEventListener('click', this.onRun);
+    }
+
+    field(name) {
+        return this.container.querySelector(`.profile-${name}`).value.trim();
+    }
+
+    async runProfile() {
+        const params = new URLSearchParams(this.field('params'));
+        params.set('client_id', (this.config.target || {}).clientId || '');
+        params.set('profile_mode', this.field('mode'));
+        params.set('profile_top', this.config.top || 20);
+
+        const windowSeconds = parseFloat(this.field('window')) || 0;
+        if (windowSeconds > 0) {
+            params.set('profile_window', windowSeconds);
+        } else {
+            params.set('experiment', this.field('experiment'));
+            params.set('name', this.field('name'));
+            params.set('profile_runs', this.field('runs'));
+        }
+
+        this.runButton.disabled = true;
+        this.runButton.textContent = windowSeconds > 0 ? `Sampling ${windowSeconds}s...` : 'Profiling...';
+        try {
+            const response = await fetch(`/profile?${params.toString()}`);
+            if (!response.ok) throw new Error(`Server error: ${response.status}`);
+            this.update([await response.json()]);
+        } catch (error) {
+            this.results.innerHTML = `<p style="color: red;">${error.message}</p>`;
+        } finally {
+            this.runButton.disabled = false;
+            this.runButton.textContent = 'Profile';
+        }
+    }
+
+    update(allData) {
+        const payload = allData[0];
+        if (!payload) return;
+        if (payload.error) {
+            this.results.innerHTML = `<p style="color: red;">Client Error: ${payload.error}</p>`;
+            return;
+        }
+
+        const profile = payload.profile;
+        const summary = profile.window_s !== undefined
+            ? `${profile.calls} module calls sampled over ${profile.window_s}s`
+            : `${profile.experiment} / ${profile.endpoint.name}: ${profile.runs} runs` +
+              (profile.per_run_ms !== undefined ? `, ${profile.per_run_ms} ms per run` : '');
+        const peak = profile.peak_kb !== undefined
+            ? `, ${profile.payload_kb} KB kept and ${profile.peak_kb} KB peak per call` +
+              (profile.traced_runs !== undefined ? ` (${profile.traced_runs} traced runs)` : '')
+            : '';
+
+        this.results.innerHTML = `<div class="profile-summary">${summary}${peak}</div>`;
+        if (profile.hot_functions) {
+            this.results.appendChild(this.table(
+                ['Function', 'Location', 'Calls', 'Own ms', 'Cumulative ms'],
+                profile.hot_functions.map(f => [f.function, `${f.file}:${f.line}`, f.calls, f.tottime_ms, f.cumtime_ms])
+            ));
+        }
+        if (profile.allocations) {
+            this.results.appendChild(this.table(
+                ['Allocation site', 'KB', 'Blocks'],
+                profile.allocations.map(a => [`${a.file}:${a.line}`, a.size_kb, a.count])
+            ));
+        }
+    }
+
+    table(headers, rows) {
+        const table = document.createElement('table');
+        table.className = 'profile-table';
+        const head = table.createTHead().insertRow();
+        headers.forEach(text => {
+            const th = document.createElement('th');
+            th.textContent = text;
+            head.appendChild(th);
+        });
+        const body = table.createTBody();
+        rows.forEach(values => {
+            const row = body.insertRow();
+            values.forEach(value => {
+                const cell = row.insertCell();
+                cell.textContent = value;
+                if (typeof value === 'number') cell.className = 'num';
+            });
+        });
+        return table;
+    }
+
+    destroy() {
+        this.runButton.removeEventListener('click', this.onRun);
+    }
+}
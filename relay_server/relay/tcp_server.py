@@ -1,16 +1,30 @@
+import socket
 import socketserver
 from .common.framing import recv_frame
 
-def create_tcp_server(addr, registry, dispatcher):
+# Seconds a new connection gets to send its hello message.
+HELLO_TIMEOUT = 10.0
+
+def create_tcp_server(addr, registry, dispatcher, pacer=None):
     class TCPHandler(socketserver.BaseRequestHandler):
         def handle(self):
             client_id = None
             try:
-                hello = recv_frame(self.request)
+                self.request.settimeout(HELLO_TIMEOUT)
+                try:
+                    hello = recv_frame(self.request)
+                except socket.timeout:
+                    hello = None
                 if not hello or hello.get('type') != 'hello':
                     print("Client failed to send hello message.")
                     return
-                
+                self.request.settimeout(None)
+
+                # Spread registrations out when many clients arrive at once.
+                if self.server.pacer and not self.server.pacer.acquire():
+                    print(f"Too many clients registering, turning away '{hello.get('client_id')}'.")
+                    return
+
                 client_id = hello['client_id']
                 self.server.registry.add_client(client_id, self.request)
 
@@ -23,12 +37,17 @@ def create_tcp_server(addr, registry, dispatcher):
 
             finally:
                 if client_id:
-                    self.server.registry.remove_client(client_id)
+                    self.server.registry.remove_client(client_id, self.request)
+                    self.server.dispatcher.connection_closed(self.request)
 
     class ThreadingTCPServer(socketserver.ThreadingTCPServer):
         allow_reuse_address = True
+        # The default listen backlog of 5 drops connections when a whole
+        # fleet reconnects at once.
+        request_queue_size = 1024
 
     server = ThreadingTCPServer(addr, TCPHandler)
     server.registry = registry
     server.dispatcher = dispatcher
+    server.pacer = pacer
     return server
\ No newline at end of file
@@ -3,17 +3,39 @@ from relay.tcp_server import create_tcp_server
 from relay.http_server import create_http_server
 from relay.registry import ClientRegistry
 from relay.dispatcher import Dispatcher
+from relay.recorder import Recorder
+from relay.pacer import RegistrationPacer
 
 # --- Configuration ---
 TCP_HOST, TCP_PORT = "0.0.0.0", 9001
 HTTP_HOST, HTTP_PORT = "0.0.0.0", 8000
 
+# --- Registration pacing (smooths reconnect storms after a relay restart) ---
+REGISTRATION_RATE = 200       # New clients registered per second
+REGISTRATION_BURST = 50       # Registrations allowed back to back
+REGISTRATION_MAX_WAIT = 5.0   # Seconds a connection may queue before it is turned away
+
+# --- Recording (history of /data responses, served back under /replay/*) ---
+RECORDING_ENABLED = False
+RECORDINGS_DIR = "recordings"
+# None records every source, otherwise a list of (client_id, experiment) pairs, "*" matches anything.
+RECORD_SOURCES = None
+RECORD_SEGMENT_BYTES = 64 * 1024 * 1024
+RECORD_MAX_SEGMENTS = 16  # Disk usage stays below RECORD_SEGMENT_BYTES * RECORD_MAX_SEGMENTS (index files included)
+
 if __name__ == "__main__":
     registry = ClientRegistry()
     dispatcher = Dispatcher(registry)
 
-    tcp_server = create_tcp_server((TCP_HOST, TCP_PORT), registry, dispatcher)
-    http_server = create_http_server((HTTP_HOST, HTTP_PORT), dispatcher)
+    recorder = None
+    if RECORDING_ENABLED:
+        recorder = Recorder(RECORDINGS_DIR, RECORD_SEGMENT_BYTES, RECORD_MAX_SEGMENTS, RECORD_SOURCES)
+        print(f"Recording data responses to '{RECORDINGS_DIR}'")
+
+    pacer = RegistrationPacer(REGISTRATION_RATE, REGISTRATION_BURST, REGISTRATION_MAX_WAIT)
+
+    tcp_server = create_tcp_server((TCP_HOST, TCP_PORT), registry, dispatcher, pacer)
+    http_server = create_http_server((HTTP_HOST, HTTP_PORT), dispatcher, recorder)
 
     tcp_thread = threading.Thread(target=tcp_server.serve_forever, daemon=True)
     http_thread = threading.Thread(target=http_server.serve_forever, daemon=True)
@@ -31,4 +53,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\nShutting down...")
         tcp_server.shutdown()
-        http_server.shutdown()
\ No newline at end of file
+        http_server.shutdown()
+        if recorder:
+            recorder.close()
\ No newline at end of file